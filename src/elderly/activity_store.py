@@ -0,0 +1,122 @@
+from array import array
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from src.utils.activity import Activity
+from src.utils.activity_counts import STATIC, TRANSITIONS, WALK, count_activities, encode
+
+# =========================
+# COLUMNAR EVENT STORE
+# =========================
+
+_ONE_DAY = timedelta(days=1)
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_DAY = _EPOCH.date()
+_ONE_SECOND = timedelta(seconds=1)
+_SECONDS_PER_DAY = 86400
+
+# Column name -> (array typecode, NumPy dtype of its zero-copy view)
+_COLUMNS = {
+    "timestamps": ("q", np.int64),
+    "activity_codes": ("B", np.uint8),
+    "fall_prob": ("f", np.float32),
+    "is_fall": ("B", np.bool_),
+}
+
+
+class ActivityStore:
+    """
+    Structure-of-arrays storage for activity events.
+
+    Events live in four parallel typed ``array.array`` columns (timestamps
+    as epoch seconds on the event's wall clock). Window metrics run on
+    zero-copy NumPy views of those buffers instead of per-event attribute
+    lookups on Python objects.
+    """
+
+    def __init__(self):
+        for name, (typecode, _) in _COLUMNS.items():
+            setattr(self, name, array(typecode))
+        self._sorted = True
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    # -------------------------
+    # Append
+    # -------------------------
+    def append(self, timestamp: datetime, activity: Activity,
+               fall_prob: float = 0.0, is_fall: bool = False):
+        # Days are bucketed on the event's own wall clock, as before
+        ts = (timestamp.replace(tzinfo=None) - _EPOCH) // _ONE_SECOND
+        if self.timestamps and ts < self.timestamps[-1]:
+            self._sorted = False
+
+        self.timestamps.append(ts)
+        self.activity_codes.append(encode(activity))
+        self.fall_prob.append(fall_prob)
+        self.is_fall.append(is_fall)
+
+    # -------------------------
+    # Drop events before a day
+    # -------------------------
+    def evict_before(self, day: date):
+        lo = self._bound(day)
+        if lo == 0:
+            return
+
+        for name in _COLUMNS:
+            del getattr(self, name)[:lo]
+
+    # -------------------------
+    # Window metrics
+    # -------------------------
+    def metrics(self, first_day: date, last_day: date) -> dict:
+        """Metrics over the inclusive day range [first_day, last_day]."""
+        lo = self._bound(first_day)
+        hi = self._bound(last_day + _ONE_DAY)
+
+        counts, near_falls, falls = count_activities(
+            self._view("activity_codes"),
+            self._view("fall_prob"),
+            self._view("is_fall"),
+            lo,
+            hi
+        )
+
+        return {
+            "walk": int(counts[WALK]),
+            "static": int(counts[STATIC]),
+            "transitions": int(counts[TRANSITIONS]),
+            "near_falls": int(near_falls),
+            "falls": int(falls),
+            "total": hi - lo
+        }
+
+    # =========================
+    # INTERNAL HELPERS
+    # =========================
+
+    def _view(self, name):
+        # Views are short-lived: an array cannot grow while one is exported
+        return np.frombuffer(getattr(self, name), dtype=_COLUMNS[name][1])
+
+    def _bound(self, day: date) -> int:
+        # Index of the first event at or after midnight of `day`
+        self._sort()
+        day_start = (day - _EPOCH_DAY).days * _SECONDS_PER_DAY
+        return int(np.searchsorted(self._view("timestamps"), day_start))
+
+    def _sort(self):
+        # Out-of-order appends are sorted once, on the next query
+        if self._sorted:
+            return
+
+        order = np.argsort(self._view("timestamps"), kind="stable")
+        for name, (typecode, _) in _COLUMNS.items():
+            column = array(typecode)
+            column.frombytes(self._view(name)[order].tobytes())
+            setattr(self, name, column)
+
+        self._sorted = True
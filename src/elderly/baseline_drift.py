@@ -1,18 +1,48 @@
-from collections import defaultdict
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List
 
-from src.utils.firebase_client import push_to_firebase
+import numpy as np
+
+from src.elderly.activity_store import ActivityStore
+from src.utils.activity import Activity
+from src.utils.firebase_client import push_batch_to_firebase, push_to_firebase
 
 # =========================
 # DATA STRUCTURE
 # =========================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ActivityEvent:
     timestamp: datetime
-    activity: str  # Walk, Static, Transitions, Exercise, Stairs
+    activity: Activity  # Walk, Static, Transitions, Exercise, Stairs
+
+    def __post_init__(self):
+        object.__setattr__(self, "activity", Activity.parse(self.activity))
+
+
+# =========================
+# DRIFT RULES
+# =========================
+
+# Current week = end day plus the six days before it
+_SIX_DAYS = timedelta(days=6)
+
+# Column order for batched (n_users, 3) metric arrays
+DRIFT_METRICS = ("walk", "transitions", "static")
+
+WALK_DECLINE_ALERT = "Walking activity has declined compared to baseline."
+TRANSITION_ALERT = "Increase in unstable transitions detected."
+INACTIVITY_ALERT = "Prolonged inactivity compared to baseline."
+NO_DRIFT_ALERT = "No significant mobility drift detected."
+
+# Current-vs-baseline ratios that trip each rule
+WALK_DECLINE_RATIO = 0.8
+TRANSITION_RISE_RATIO = 1.2
+INACTIVITY_RISE_RATIO = 1.25
+
+# Alert per rule, in DRIFT_METRICS column order
+_RULE_ALERTS = (WALK_DECLINE_ALERT, TRANSITION_ALERT, INACTIVITY_ALERT)
 
 
 # =========================
@@ -21,36 +51,44 @@ class ActivityEvent:
 
 class BaselineDriftDetector:
 
+    # Drift level indexed by drift score (three rules, so at most 3)
+    _LEVELS = ("Low", "Medium", "High", "High")
+
     def __init__(self, baseline_days: int = 7):
         self.baseline_days = baseline_days
-        self.daily_events = defaultdict(list)
+        self.store = ActivityStore()
+
+        # Baseline + current week is all drift detection ever reads
+        self.window_days = baseline_days + 7
+        self.latest_day = None
+
+        # Window offsets are fixed per detector; build them once
+        self._baseline_span = timedelta(days=baseline_days - 1)
+        self._window_span = timedelta(days=self.window_days)
 
     # -------------------------
     # Add activity event
     # -------------------------
     def add_event(self, event: ActivityEvent):
+        self.store.append(event.timestamp, event.activity)
+
+        # Evict days that fell out of the window when a new day starts
         day = event.timestamp.date()
-        self.daily_events[day].append(event)
+        if self.latest_day is None or day > self.latest_day:
+            self.latest_day = day
+            self.store.evict_before(day - self._window_span)
 
     # -------------------------
     # Compute baseline metrics
     # -------------------------
     def compute_baseline(self, start_day):
-        baseline_events = []
-        for i in range(self.baseline_days):
-            day = start_day + timedelta(days=i)
-            baseline_events.extend(self.daily_events.get(day, []))
-        return self._extract_metrics(baseline_events)
+        return self._extract_metrics(start_day, start_day + self._baseline_span)
 
     # -------------------------
     # Compute current week metrics
     # -------------------------
     def compute_current_week(self, end_day):
-        current_events = []
-        for i in range(7):
-            day = end_day - timedelta(days=i)
-            current_events.extend(self.daily_events.get(day, []))
-        return self._extract_metrics(current_events)
+        return self._extract_metrics(end_day - _SIX_DAYS, end_day)
 
     # -------------------------
     # Drift detection + Firebase
@@ -60,24 +98,24 @@ class BaselineDriftDetector:
         alerts = []
 
         # Walking decline
-        if current["walk"] < baseline["walk"] * 0.8:
+        if current["walk"] < baseline["walk"] * WALK_DECLINE_RATIO:
             drift_score += 1
-            alerts.append("Walking activity has declined compared to baseline.")
+            alerts.append(WALK_DECLINE_ALERT)
 
         # Transition increase
-        if current["transitions"] > baseline["transitions"] * 1.2:
+        if current["transitions"] > baseline["transitions"] * TRANSITION_RISE_RATIO:
             drift_score += 1
-            alerts.append("Increase in unstable transitions detected.")
+            alerts.append(TRANSITION_ALERT)
 
         # Inactivity increase
-        if current["static"] > baseline["static"] * 1.25:
+        if current["static"] > baseline["static"] * INACTIVITY_RISE_RATIO:
             drift_score += 1
-            alerts.append("Prolonged inactivity compared to baseline.")
+            alerts.append(INACTIVITY_ALERT)
 
         drift_level = self._map_drift_level(drift_score)
 
         if not alerts:
-            alerts.append("No significant mobility drift detected.")
+            alerts.append(NO_DRIFT_ALERT)
 
         result = {
             "user_id": user_id,
@@ -96,27 +134,70 @@ class BaselineDriftDetector:
 
         return result
 
+    # -------------------------
+    # Batched drift detection
+    # -------------------------
+    def detect_drift_batch(self, user_ids: List[str], baseline_metrics, current_metrics):
+        """
+        Same rules as detect_drift, evaluated for many users at once.
+        Metric arrays are (n_users, 3) in DRIFT_METRICS column order.
+        """
+        # reshape keeps an empty batch 2-D
+        base = np.asarray(baseline_metrics).reshape(-1, len(DRIFT_METRICS))
+        curr = np.asarray(current_metrics).reshape(-1, len(DRIFT_METRICS))
+
+        if not len(user_ids) == len(base) == len(curr):
+            raise ValueError(
+                f"detect_drift_batch needs one metric row per user: got {len(user_ids)} "
+                f"user_ids, {len(base)} baseline rows, {len(curr)} current rows"
+            )
+
+        flags = np.stack([
+            curr[:, 0] < base[:, 0] * WALK_DECLINE_RATIO,
+            curr[:, 1] > base[:, 1] * TRANSITION_RISE_RATIO,
+            curr[:, 2] > base[:, 2] * INACTIVITY_RISE_RATIO
+        ], axis=1)
+        scores = flags.sum(axis=1)
+
+        results = []
+        for i, user_id in enumerate(user_ids):
+            score = int(scores[i])
+
+            # Only users with drift need their alerts gathered
+            if score:
+                alerts = [a for a, hit in zip(_RULE_ALERTS, flags[i]) if hit]
+            else:
+                alerts = [NO_DRIFT_ALERT]
+
+            results.append({
+                "user_id": user_id,
+                "baseline_metrics": dict(zip(DRIFT_METRICS, base[i].tolist())),
+                "current_metrics": dict(zip(DRIFT_METRICS, curr[i].tolist())),
+                "drift_score": score,
+                "drift_level": self._map_drift_level(score),
+                "alerts": alerts
+            })
+
+        # 🔥 PUSH TO FIREBASE (one batched commit)
+        push_batch_to_firebase("elderly_baseline_drift", results)
+
+        return results
+
     # =========================
     # INTERNAL HELPERS
     # =========================
 
-    def _extract_metrics(self, events: List[ActivityEvent]):
-        if not events:
-            return {"walk": 0, "transitions": 0, "static": 0}
+    def _extract_metrics(self, first_day: date, last_day: date):
+        metrics = self.store.metrics(first_day, last_day)
 
         return {
-            "walk": sum(e.activity == "Walk" for e in events),
-            "transitions": sum(e.activity == "Transitions" for e in events),
-            "static": sum(e.activity == "Static" for e in events)
+            "walk": metrics["walk"],
+            "transitions": metrics["transitions"],
+            "static": metrics["static"]
         }
 
     def _map_drift_level(self, score):
-        if score == 0:
-            return "Low"
-        elif score == 1:
-            return "Medium"
-        else:
-            return "High"
+        return self._LEVELS[min(score, 3)]
 
 
 # =========================
@@ -137,17 +218,17 @@ if __name__ == "__main__":
         for _ in range(40):
             detector.add_event(ActivityEvent(
                 timestamp=datetime.combine(day, datetime.min.time()),
-                activity="Walk"
+                activity=Activity.Walk
             ))
         for _ in range(5):
             detector.add_event(ActivityEvent(
                 timestamp=datetime.combine(day, datetime.min.time()),
-                activity="Transitions"
+                activity=Activity.Transitions
             ))
         for _ in range(10):
             detector.add_event(ActivityEvent(
                 timestamp=datetime.combine(day, datetime.min.time()),
-                activity="Static"
+                activity=Activity.Static
             ))
 
     # -------------------------
@@ -158,17 +239,17 @@ if __name__ == "__main__":
         for _ in range(20):
             detector.add_event(ActivityEvent(
                 timestamp=datetime.combine(day, datetime.min.time()),
-                activity="Walk"
+                activity=Activity.Walk
             ))
         for _ in range(15):
             detector.add_event(ActivityEvent(
                 timestamp=datetime.combine(day, datetime.min.time()),
-                activity="Transitions"
+                activity=Activity.Transitions
             ))
         for _ in range(25):
             detector.add_event(ActivityEvent(
                 timestamp=datetime.combine(day, datetime.min.time()),
-                activity="Static"
+                activity=Activity.Static
             ))
 
     # -------------------------
@@ -1,20 +1,31 @@
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List
+from typing import Iterable, List, Optional
 
+import numpy as np
+
+from src.elderly.baseline_drift import NO_DRIFT_ALERT
 from src.utils.firebase_client import push_to_firebase
 
+# =========================
+# SEVERITY LEVELS
+# =========================
+
+SEVERITY_LEVELS = ("Low", "Medium", "High")
+
+
 # =========================
 # DATA STRUCTURES
 # =========================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RiskSnapshot:
     timestamp: datetime
     fall_risk_score: float   # 0–100
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DriftResult:
     drift_level: str         # Low / Medium / High
     alerts: List[str]        # Narrative drift alerts
@@ -26,81 +37,117 @@ class DriftResult:
 
 class CaregiverAlertGenerator:
 
+    def __init__(self, firebase_enabled: bool = True):
+        self.firebase_enabled = firebase_enabled
+
     # -------------------------
     # Main alert generator
     # -------------------------
     def generate_alert(
         self,
         user_id: str,
-        risk_history: List[RiskSnapshot],
-        drift_result: DriftResult
+        risk_history: Iterable[RiskSnapshot],
+        drift_result: DriftResult,
+        timestamp: Optional[str] = None
     ) -> dict:
 
         messages = []
-        severity = "Low"
+        sev = 0  # index into SEVERITY_LEVELS
 
         # -------------------------
         # Risk trend analysis
         # -------------------------
-        risk_trend = self._analyze_risk_trend(risk_history)
+        # Read history once: generators cannot be indexed afterwards
+        recent = self._recent_snapshots(risk_history)
+        risk_trend = self._analyze_risk_trend(recent)
 
         if risk_trend == "Increasing":
             messages.append("Fall risk has been increasing steadily over recent days.")
-            severity = "Medium"
+            sev = max(sev, 1)
 
         if risk_trend == "High":
             messages.append("High fall risk detected. Immediate attention is recommended.")
-            severity = "High"
+            sev = 2
 
         # -------------------------
         # Drift-based alerts
         # -------------------------
         if drift_result.drift_level == "Medium":
             messages.append("Mobility patterns show noticeable decline compared to baseline.")
-            severity = max(severity, "Medium", key=self._severity_rank)
+            sev = max(sev, 1)
 
         if drift_result.drift_level == "High":
             messages.append("Significant mobility decline detected over multiple weeks.")
-            severity = "High"
+            sev = 2
 
         for alert in drift_result.alerts:
-            if alert != "No significant mobility drift detected.":
+            if alert != NO_DRIFT_ALERT:
                 messages.append(alert)
 
         # -------------------------
         # Final recommendation
         # -------------------------
-        if severity == "High":
+        if sev == 2:
             messages.append("Recommend immediate caregiver check-in or medical consultation.")
-        elif severity == "Medium":
+        elif sev == 1:
             messages.append("Recommend caregiver monitoring and follow-up.")
         else:
             messages.append("Mobility stable. No immediate intervention required.")
 
         alert_payload = {
             "user_id": user_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "severity": severity,
+            # Batch callers pass one shared timestamp instead of one per alert
+            "timestamp": timestamp or datetime.now(timezone.utc).isoformat(),
+            "severity": SEVERITY_LEVELS[sev],
             "messages": messages,
             "drift_level": drift_result.drift_level,
-            "latest_fall_risk": risk_history[-1].fall_risk_score if risk_history else None
+            "latest_fall_risk": recent[-1].fall_risk_score if recent else None
         }
 
         # 🔥 PUSH TO FIREBASE
-        push_to_firebase("caregiver_alerts", alert_payload)
+        if self.firebase_enabled:
+            push_to_firebase("caregiver_alerts", alert_payload)
 
         return alert_payload
 
+    # -------------------------
+    # Batch trend classification
+    # -------------------------
+    def classify_risk_trends(self, recent_scores) -> List[str]:
+        """
+        Classify many users at once from an (n_users, 3) array holding
+        each user's last three fall risk scores, oldest first.
+        """
+        scores = np.asarray(recent_scores, dtype=float)
+        if scores.size == 0:
+            return []
+        if scores.ndim != 2 or scores.shape[1] != 3:
+            raise ValueError(
+                f"recent_scores must have shape (n_users, 3), got {scores.shape}"
+            )
+
+        high = scores[:, -1] > 70
+        increasing = (np.diff(scores, axis=1) > 0).all(axis=1)
+
+        return np.where(high, "High", np.where(increasing, "Increasing", "Stable")).tolist()
+
     # =========================
     # INTERNAL HELPERS
     # =========================
 
-    def _analyze_risk_trend(self, history: List[RiskSnapshot]) -> str:
-        if len(history) < 3:
+    def _recent_snapshots(self, history: Iterable[RiskSnapshot]):
+        # Only the last three snapshots matter; keep them without copying history
+        if isinstance(history, (list, tuple)):
+            return history[-3:]
+        return deque(history, maxlen=3)
+
+    def _analyze_risk_trend(self, history: Iterable[RiskSnapshot]) -> str:
+        recent = self._recent_snapshots(history)
+
+        if len(recent) < 3:
             return "Stable"
 
-        recent = history[-3:]
-        scores = [r.fall_risk_score for r in recent]
+        scores = tuple(r.fall_risk_score for r in recent)
 
         if scores[-1] > 70:
             return "High"
@@ -110,10 +157,6 @@ class CaregiverAlertGenerator:
 
         return "Stable"
 
-    def _severity_rank(self, level):
-        ranking = {"Low": 0, "Medium": 1, "High": 2}
-        return ranking[level]
-
 
 # =========================
 # DEMO / TEST RUN
@@ -1,21 +1,27 @@
-from collections import defaultdict
+from collections import Counter
+from copy import deepcopy
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import List, Optional
 from dataclasses import dataclass
 
-from src.utils.firebase_client import push_to_firebase
+from src.elderly.activity_store import ActivityStore
+from src.utils.activity import Activity
+from src.utils.firebase_client import push_batch_to_firebase, push_to_firebase
 
 # =========================
 # DATA STRUCTURE
 # =========================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ActivityEvent:
     timestamp: datetime
-    activity: str           # Walk, Static, Transitions, Exercise, Stairs
+    activity: Activity      # Walk, Static, Transitions, Exercise, Stairs
     fall_prob: float
     is_fall: bool
 
+    def __post_init__(self):
+        object.__setattr__(self, "activity", Activity.parse(self.activity))
+
 
 # =========================
 # MOTION BIOGRAPHY ENGINE
@@ -23,49 +29,92 @@ class ActivityEvent:
 
 class MotionBiography:
 
-    def __init__(self):
-        self.daily_data = defaultdict(list)
+    # Day offsets 0..14, shared by every weekly query
+    _DAYS = tuple(timedelta(days=i) for i in range(15))
+
+    # Entries kept per summary cache; the oldest is evicted first
+    _CACHE_SIZE = 1024
+
+    def __init__(self, firebase_enabled: bool = True):
+        self.firebase_enabled = firebase_enabled
+        self.store = ActivityStore()
+
+        # Events per day double as a version tag for cached summaries
+        self.day_sizes = Counter()
+        self._summary_cache = {}
+        self._weekly_cache = {}
+        self._pending = []
 
     # -------------------------
     # Add events
     # -------------------------
     def add_event(self, event: ActivityEvent):
-        self.daily_data[event.timestamp.date()].append(event)
+        self.store.append(
+            event.timestamp,
+            event.activity,
+            event.fall_prob,
+            event.is_fall
+        )
+        self.day_sizes[event.timestamp.date()] += 1
 
     # -------------------------
     # Daily summary
     # -------------------------
-    def generate_daily_summary(self, user_id: str, day):
-        events = self.daily_data.get(day, [])
-        if not events:
+    def generate_daily_summary(self, user_id: str, day, defer_push: bool = False,
+                               timestamp: Optional[str] = None):
+        # Unchanged day -> summary was already computed and stored
+        version = self.day_sizes[day]
+        cached = self._summary_cache.get((user_id, day))
+        if cached is not None and cached[0] == version:
+            # Callers get a copy so mutating it cannot corrupt the cache
+            summary = dict(cached[1])
+            if timestamp:
+                summary["timestamp"] = timestamp
+            return summary
+
+        metrics = self._summarize(day)
+        if metrics is None:
             return None
 
         summary = {
             "user_id": user_id,
             "date": str(day),
-            "walking_duration": sum(e.activity == "Walk" for e in events),
-            "transition_count": sum(e.activity == "Transitions" for e in events),
-            "near_falls": sum(0.45 <= e.fall_prob < 0.7 for e in events),
-            "inactivity_time": sum(e.activity == "Static" for e in events),
-            "fall_risk_score": self._compute_fall_risk(events),
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            **metrics,
+            # Batch callers pass one shared timestamp instead of one per summary
+            "timestamp": timestamp or datetime.now(timezone.utc).isoformat()
         }
 
-        # 🔥 Store daily biography
-        push_to_firebase("elderly_motion_biography_daily", summary)
+        # 🔥 Store daily biography (deferred summaries go out on flush())
+        if self.firebase_enabled:
+            if defer_push:
+                self._pending.append(summary)
+            else:
+                push_to_firebase("elderly_motion_biography_daily", summary)
+
+        self._remember(self._summary_cache, (user_id, day), version, summary)
+        return dict(summary)
 
-        return summary
+    # -------------------------
+    # Flush deferred summaries
+    # -------------------------
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if pending:
+            push_batch_to_firebase("elderly_motion_biography_daily", pending)
+        return len(pending)
 
     # -------------------------
     # Weekly comparison
     # -------------------------
     def generate_weekly_trend(self, user_id: str, end_day):
-        this_week = []
-        last_week = []
+        days = self._DAYS
+        version = tuple(self.day_sizes[end_day - days[i]] for i in range(14))
+        cached = self._weekly_cache.get((user_id, end_day))
+        if cached is not None and cached[0] == version:
+            return deepcopy(cached[1])
 
-        for i in range(7):
-            this_week.extend(self.daily_data.get(end_day - timedelta(days=i), []))
-            last_week.extend(self.daily_data.get(end_day - timedelta(days=i + 7), []))
+        this_week = self.store.metrics(end_day - days[6], end_day)
+        last_week = self.store.metrics(end_day - days[13], end_day - days[7])
 
         trend = self._compare_weeks(this_week, last_week)
         narratives = self.generate_narrative(trend)
@@ -79,9 +128,11 @@ class MotionBiography:
         }
 
         # 🔥 Store weekly biography
-        push_to_firebase("elderly_motion_biography_weekly", payload)
+        if self.firebase_enabled:
+            push_to_firebase("elderly_motion_biography_weekly", payload)
 
-        return payload
+        self._remember(self._weekly_cache, (user_id, end_day), version, payload)
+        return deepcopy(payload)
 
     # -------------------------
     # Narrative generation
@@ -107,49 +158,45 @@ class MotionBiography:
     # INTERNAL METHODS
     # =========================
 
-    def _compute_fall_risk(self, events):
-        total = len(events)
-        if total == 0:
-            return 0.0
+    def _remember(self, cache, key, version, payload):
+        cache.pop(key, None)  # re-insert as the newest entry
+        cache[key] = (version, payload)
+        if len(cache) > self._CACHE_SIZE:
+            del cache[next(iter(cache))]
 
-        fall_count = sum(e.is_fall for e in events)
-        near_falls = sum(0.45 <= e.fall_prob < 0.7 for e in events)
-        transitions = sum(e.activity == "Transitions" for e in events)
-        inactivity = sum(e.activity == "Static" for e in events)
+    def _summarize(self, day):
+        # One kernel pass feeds both the daily counts and the fall risk
+        counts = self.store.metrics(day, day)
+        total = counts["total"]
+        if total == 0:
+            return None
 
         risk = (
-            0.4 * (fall_count / total) +
-            0.3 * (near_falls / total) +
-            0.2 * (transitions / total) +
-            0.1 * (inactivity / total)
+            0.4 * (counts["falls"] / total) +
+            0.3 * (counts["near_falls"] / total) +
+            0.2 * (counts["transitions"] / total) +
+            0.1 * (counts["static"] / total)
         )
 
-        return round(min(risk * 100, 100), 2)
+        return {
+            "walking_duration": counts["walk"],
+            "transition_count": counts["transitions"],
+            "near_falls": counts["near_falls"],
+            "inactivity_time": counts["static"],
+            "fall_risk_score": round(min(risk * 100, 100), 2)
+        }
 
     def _compare_weeks(self, this_week, last_week):
 
-        def extract_metrics(events):
-            if not events:
-                return {"walk": 0, "near_fall": 0, "inactivity": 0}
-
-            return {
-                "walk": sum(e.activity == "Walk" for e in events),
-                "near_fall": sum(0.45 <= e.fall_prob < 0.7 for e in events),
-                "inactivity": sum(e.activity == "Static" for e in events)
-            }
-
-        curr = extract_metrics(this_week)
-        prev = extract_metrics(last_week)
-
         def pct_change(curr, prev):
             if prev == 0:
                 return 0
             return round(((curr - prev) / prev) * 100, 2)
 
         return {
-            "walk_change": pct_change(curr["walk"], prev["walk"]),
-            "near_fall_change": pct_change(curr["near_fall"], prev["near_fall"]),
-            "inactivity_change": pct_change(curr["inactivity"], prev["inactivity"])
+            "walk_change": pct_change(this_week["walk"], last_week["walk"]),
+            "near_fall_change": pct_change(this_week["near_falls"], last_week["near_falls"]),
+            "inactivity_change": pct_change(this_week["static"], last_week["static"])
         }
 
 
@@ -162,6 +209,7 @@ if __name__ == "__main__":
     mb = MotionBiography()
     today = datetime.now(timezone.utc).date()
     user_id = "ELDER_001"
+    run_timestamp = datetime.now(timezone.utc).isoformat()
 
     # Simulated activity stream (14 days)
     for d in range(14):
@@ -169,13 +217,15 @@ if __name__ == "__main__":
         for _ in range(50):
             mb.add_event(ActivityEvent(
                 timestamp=datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc),
-                activity="Walk" if d < 7 else "Static",
+                activity=Activity.Walk if d < 7 else Activity.Static,
                 fall_prob=0.55 if d < 7 else 0.30,
                 is_fall=False
             ))
 
-        # Generate daily summary
-        mb.generate_daily_summary(user_id, day)
+        # Generate daily summary (written in one batch below)
+        mb.generate_daily_summary(user_id, day, defer_push=True, timestamp=run_timestamp)
+
+    mb.flush()
 
     # Generate weekly trend
     weekly_result = mb.generate_weekly_trend(user_id, today)
@@ -1,7 +1,9 @@
-from datetime import datetime, timezone
-from collections import defaultdict
-
+from src.utils.activity import Activity, label
+from src.utils.clock import utc_now_iso
 from src.utils.firebase_client import push_to_firebase
+from src.utils.user_counters import UserCounters
+from src.utils.zone import Zone
+from src.workplace.workplace_safety import VIOLATION_PENALTY
 
 # ===============================
 # ROLE CONSTANTS
@@ -12,6 +14,90 @@ EMPLOYEE = "employee"
 REHAB = "rehab"
 
 
+# ===============================
+# RULE TABLES
+# ===============================
+
+# activity -> (insight, risk contributor or None)
+ELDERLY_RULES = {
+    Activity.Walk: ("Walking activity observed", None),
+    Activity.Transitions: ("Instability detected during posture change", "transition_instability"),
+    Activity.Static: ("Prolonged inactivity detected", "inactivity"),
+    Activity.Exercise: ("Fatigue risk detected", None),
+    Activity.Stairs: ("Stair usage increases fall risk", "stairs_risk"),
+}
+
+# added when fall_prob > 0.6: (insight, risk contributor)
+HIGH_FALL_RISK = ("High fall risk detected", "fall_risk")
+
+# (zone, activity) -> violation
+WORKPLACE_ZONE_RULES = {
+    (Zone.Restricted_Zone, Activity.Walk): "Restricted zone entry",
+    (Zone.Hazard_Zone, Activity.Stairs): "Hazard zone stair activity",
+}
+
+# activity -> violation, regardless of zone
+WORKPLACE_ACTIVITY_RULES = {
+    Activity.Exercise: "Overexertion risk",
+    Activity.Static: "Possible collapse risk",
+    Activity.Transitions: "Unsafe posture detected",
+}
+
+
+# ===============================
+# RULE CODEGEN
+# ===============================
+# The rule tables are compiled once at import into straight-line functions
+# that return constant tuples, so no per-event dict walk or list building.
+
+def _compile(src, name):
+    namespace = {}
+    exec(compile(src, "<rules>", "exec"), namespace)
+    return namespace[name]
+
+
+def _gen_elderly_rules():
+    fall_insight, fall_contributor = HIGH_FALL_RISK
+
+    def outcome(insights, contributors):
+        high = (insights + (fall_insight,), contributors + (fall_contributor,))
+        return f"{high!r} if high_fall_risk else {(insights, contributors)!r}"
+
+    lines = ["def _elderly_rules(activity, high_fall_risk):"]
+    for activity, (insight, contributor) in ELDERLY_RULES.items():
+        contributors = (contributor,) if contributor else ()
+        lines.append(f"    if activity == {int(activity)}:")
+        lines.append(f"        return {outcome((insight,), contributors)}")
+    lines.append(f"    return {outcome((), ())}")
+
+    return _compile("\n".join(lines), "_elderly_rules")
+
+
+def _gen_workplace_rules():
+    lines = ["def _workplace_rules(zone, activity):"]
+    for activity in Activity:
+        zone_rules = [(z, v) for (z, a), v in WORKPLACE_ZONE_RULES.items() if a is activity]
+        tail = (WORKPLACE_ACTIVITY_RULES[activity],) if activity in WORKPLACE_ACTIVITY_RULES else ()
+        if not zone_rules and not tail:
+            continue
+
+        lines.append(f"    if activity == {int(activity)}:")
+        for zone, violation in zone_rules:
+            lines.append(f"        if zone == {int(zone)}:")
+            lines.append(f"            return {(violation,) + tail!r}")
+        lines.append(f"        return {tail!r}")
+    lines.append("    return ()")
+
+    return _compile("\n".join(lines), "_workplace_rules")
+
+
+# activity, high_fall_risk -> (insights, risk contributors)
+_elderly_rules = _gen_elderly_rules()
+
+# zone, activity -> violations (zone rule first, then activity rule)
+_workplace_rules = _gen_workplace_rules()
+
+
 # ===============================
 # CONTEXT ENGINE
 # ===============================
@@ -23,27 +109,27 @@ class ContextEngine:
     """
 
     def __init__(self):
-        self.workplace_violations = defaultdict(int)
+        # Workplace violation count and running safety score (updated only
+        # when a violation is recorded) per user
+        self._workplace = UserCounters(violations=0, safety_score=100)
+
+        # role -> (handler, Firestore collection)
+        self._role_handlers = {
+            ELDERLY: (self._elderly_logic, "elderly_context_events"),
+            EMPLOYEE: (self._workplace_logic, "workplace_context_events"),
+            REHAB: (self._rehab_logic, "rehab_context_events"),
+        }
 
     # --------------------------------------------------
     # MAIN ROUTER
     # --------------------------------------------------
     def route_event(self, user_profile, activity_event, zone_event=None):
-        role = user_profile["role"]
+        route = self._role_handlers.get(user_profile["role"])
 
-        if role == ELDERLY:
-            result = self._elderly_logic(activity_event)
-            push_to_firebase("elderly_context_events", result)
-            return result
-
-        if role == EMPLOYEE:
-            result = self._workplace_logic(activity_event, zone_event)
-            push_to_firebase("workplace_context_events", result)
-            return result
-
-        if role == REHAB:
-            result = self._rehab_logic(activity_event)
-            push_to_firebase("rehab_context_events", result)
+        if route is not None:
+            handler, collection = route
+            result = handler(activity_event, zone_event)
+            push_to_firebase(collection, result)
             return result
 
         unknown = {
@@ -57,44 +143,22 @@ class ContextEngine:
     # ==================================================
     # ELDERLY CARE LOGIC
     # ==================================================
-    def _elderly_logic(self, activity_event):
+    def _elderly_logic(self, activity_event, zone_event=None):
 
-        insights = []
-        risk_contributors = []
-
-        activity = activity_event["activity"]
+        # Raw labels or enum members; unknown labels match no rule
+        activity = Activity.parse(activity_event["activity"])
         fall_prob = activity_event.get("fall_prob", 0.0)
 
-        if activity == "Walk":
-            insights.append("Walking activity observed")
-
-        if activity == "Transitions":
-            insights.append("Instability detected during posture change")
-            risk_contributors.append("transition_instability")
-
-        if activity == "Static":
-            insights.append("Prolonged inactivity detected")
-            risk_contributors.append("inactivity")
-
-        if activity == "Exercise":
-            insights.append("Fatigue risk detected")
-
-        if activity == "Stairs":
-            insights.append("Stair usage increases fall risk")
-            risk_contributors.append("stairs_risk")
-
-        if fall_prob > 0.6:
-            insights.append("High fall risk detected")
-            risk_contributors.append("fall_risk")
+        insights, risk_contributors = _elderly_rules(activity, fall_prob > 0.6)
 
         return {
             "domain": "elderly",
             "timestamp": self._utc_time(),
             "user_id": activity_event["user_id"],
-            "activity": activity,
+            "activity": label(activity),
             "fall_probability": round(fall_prob, 2),
-            "insights": insights,
-            "risk_contributors": risk_contributors,
+            "insights": list(insights),
+            "risk_contributors": list(risk_contributors),
             "output": "Caregiver alert / preventive recommendation"
         }
 
@@ -103,47 +167,31 @@ class ContextEngine:
     # ==================================================
     def _workplace_logic(self, activity_event, zone_event):
 
-        violations = []
-
-        activity = activity_event["activity"]
+        activity = Activity.parse(activity_event["activity"])
         user_id = activity_event["user_id"]
+        zone = Zone.parse(zone_event["zone"]) if zone_event else "Unknown"
 
-        if zone_event:
-            zone = zone_event["zone"]
-
-            if zone == "Restricted_Zone" and activity == "Walk":
-                violations.append("Restricted zone entry")
-                self.workplace_violations[user_id] += 1
-
-            if zone == "Hazard_Zone" and activity == "Stairs":
-                violations.append("Hazard zone stair activity")
-                self.workplace_violations[user_id] += 1
-        else:
-            zone = "Unknown"
-
-        if activity == "Exercise":
-            violations.append("Overexertion risk")
-            self.workplace_violations[user_id] += 1
-
-        if activity == "Static":
-            violations.append("Possible collapse risk")
-            self.workplace_violations[user_id] += 1
+        counters = self._workplace
+        row = counters.row(user_id)
 
-        if activity == "Transitions":
-            violations.append("Unsafe posture detected")
-            self.workplace_violations[user_id] += 1
+        violations = _workplace_rules(zone, activity)
+        if violations:
+            counters.violations[row] += len(violations)
+            counters.safety_score[row] = max(
+                counters.safety_score[row] - VIOLATION_PENALTY * len(violations), 0
+            )
 
-        violation_count = self.workplace_violations[user_id]
+        violation_count = int(counters.violations[row])
         escalation = self._escalation_level(violation_count)
-        safety_score = max(100 - (violation_count * 15), 0)
+        safety_score = int(counters.safety_score[row])
 
         return {
             "domain": "workplace",
             "timestamp": self._utc_time(),
             "user_id": user_id,
-            "activity": activity,
-            "zone": zone,
-            "violations": violations,
+            "activity": label(activity),
+            "zone": label(zone),
+            "violations": list(violations),
             "violation_count": violation_count,
             "escalation_level": escalation,
             "safety_score": safety_score,
@@ -153,12 +201,12 @@ class ContextEngine:
     # ==================================================
     # REHAB LOGIC (Placeholder)
     # ==================================================
-    def _rehab_logic(self, activity_event):
+    def _rehab_logic(self, activity_event, zone_event=None):
         return {
             "domain": "rehab",
             "timestamp": self._utc_time(),
             "user_id": activity_event["user_id"],
-            "activity": activity_event["activity"],
+            "activity": label(activity_event["activity"]),
             "status": "Tracked for rehabilitation analysis"
         }
 
@@ -179,7 +227,7 @@ class ContextEngine:
     # TIME UTILITY
     # ==================================================
     def _utc_time(self):
-        return datetime.now(timezone.utc).isoformat()
+        return utc_now_iso()
 
 
 # ==================================================
@@ -1,9 +1,12 @@
 # src/rehab/limb_rehab.py
 
 import pickle
-import pandas as pd
+import threading
+import warnings
+import numpy as np
 import os
 from datetime import datetime, timezone
+from functools import lru_cache
 
 from src.utils.firebase_client import push_to_firebase
 
@@ -55,14 +58,35 @@ patient_data = {
     "acc_energy": 10.5
 }
 
-X_patient = pd.DataFrame([patient_data], columns=FEATURES)
-
 # ==============================
 # PREDICT RSI
+# (single row, no DataFrame overhead)
 # ==============================
 
-predicted_rsi = float(model.predict(X_patient)[0])
-predicted_rsi = round(predicted_rsi, 2)
+# Features are rounded to 4 significant digits (at most 0.05% relative
+# error per feature) so near-identical sensor frames share a cache entry
+FEATURE_SIG_DIGITS = 4
+
+# catch_warnings swaps process-global state; overlapping calls must not interleave
+_PREDICT_LOCK = threading.Lock()
+
+def predict_rsi(features: dict) -> float:
+    key = tuple(float(f"{features[k]:.{FEATURE_SIG_DIGITS}g}") for k in FEATURES)
+    return _predict_rsi(key)
+
+@lru_cache(maxsize=1024)
+def _predict_rsi(key: tuple) -> float:
+    # Row is built per call: lru_cache does not serialize concurrent misses
+    row = np.array([key], dtype=np.float64)
+
+    # Model was fit on a DataFrame; the positional row matches FEATURES order
+    with _PREDICT_LOCK, warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        rsi = model.predict(row)[0]
+
+    return round(float(rsi), 2)
+
+predicted_rsi = predict_rsi(patient_data)
 
 # ==============================
 # INTERPRET RSI (CLINICAL)
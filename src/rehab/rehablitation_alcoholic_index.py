@@ -1,7 +1,8 @@
 # src/rehab/rehablitation_alcoholic_index.py
 
 import pickle
-import pandas as pd
+import warnings
+import numpy as np
 import os
 from datetime import datetime, timezone
 
@@ -19,26 +20,17 @@ SLEEP_MODEL_PATH = os.path.join(MODEL_DIR, "sleep_quality_model.pkl")
 STRESS_MODEL_PATH = os.path.join(MODEL_DIR, "stress_regulation_model.pkl")
 
 # ==============================
-# Utility: Test pickle loading
+# Load model bundles (once each)
 # ==============================
 
-def test_pickle(file):
-    with open(file, "rb") as f:
-        _ = pickle.load(f)
-    print(f"✅ {os.path.basename(file)} loaded successfully")
+def _load(path):
+    with open(path, "rb") as f:
+        bundle = pickle.load(f)
+    print(f"✅ {os.path.basename(path)} loaded successfully")
+    return bundle
 
-test_pickle(SLEEP_MODEL_PATH)
-test_pickle(STRESS_MODEL_PATH)
-
-# ==============================
-# Load model bundles
-# ==============================
-
-with open(SLEEP_MODEL_PATH, "rb") as f:
-    sleep_bundle = pickle.load(f)
-
-with open(STRESS_MODEL_PATH, "rb") as f:
-    stress_bundle = pickle.load(f)
+sleep_bundle = _load(SLEEP_MODEL_PATH)
+stress_bundle = _load(STRESS_MODEL_PATH)
 
 sleep_model = sleep_bundle["model"]
 stress_model = stress_bundle["model"]
@@ -54,30 +46,30 @@ print(stress_features)
 
 # ==============================
 # Dummy input (replace later)
+# (plain NumPy rows in each bundle's feature order)
 # ==============================
 
-sleep_input = pd.DataFrame(
-    [[0] * len(sleep_features)],
-    columns=sleep_features
-)
+sleep_input = np.zeros((1, len(sleep_features)), dtype=np.float64)
+stress_input = np.zeros((1, len(stress_features)), dtype=np.float64)
 
-stress_input = pd.DataFrame(
-    [[0] * len(stress_features)],
-    columns=stress_features
-)
+def predict_proba(model, row):
+    # Silence the missing-feature-names warning for this call only
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        return model.predict_proba(row)
 
 # ==============================
 # Sleep Model Inference
 # ==============================
 
-sleep_prob = sleep_model.predict_proba(sleep_input)
+sleep_prob = predict_proba(sleep_model, sleep_input)
 sleep_score = round(float(sleep_prob[0, 1] * 100), 2)
 
 # ==============================
 # Stress Model Inference
 # ==============================
 
-stress_probs = stress_model.predict_proba(stress_input)
+stress_probs = predict_proba(stress_model, stress_input)
 
 stress_score = round(
     (stress_probs[0, 0] + 0.5 * stress_probs[0, 1]) * 100,
@@ -1,29 +1,24 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List
+from typing import List, NamedTuple, Union
 from datetime import datetime
 import os
+import threading
+
+import numpy as np
 
-from twilio.rest import Client
 from dotenv import load_dotenv
 
+from src.utils.activity import Activity
+from src.utils.activity_counts import (
+    EXERCISE, STATIC, TRANSITIONS, WALK, count_activities, encode
+)
+from src.utils.firebase_client import push_to_firebase
+
 # Load environment variables from .env file
 load_dotenv()
 
 
-# ==============================
-# FIREBASE INITIALIZATION
-# ==============================
-
-FIREBASE_KEY_PATH = "activitymotiondetection-firebase-adminsdk-fbsvc-3560a9a703.json"
-
-if not firebase_admin._apps:
-    cred = credentials.Certificate(FIREBASE_KEY_PATH)
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
-
 # ==============================
 # TWILIO INITIALIZATION
 # ==============================
@@ -34,16 +29,30 @@ twilio_from = os.getenv("TWILIO_PHONE_NUMBER")
 alert_to = os.getenv("ALERT_PHONE_NUMBER")
 fall_risk_threshold = float(os.getenv("FALL_RISK_THRESHOLD", "50.0"))
 
-if not all([twilio_sid, twilio_token, twilio_from, alert_to]):
+twilio_enabled = all([twilio_sid, twilio_token, twilio_from, alert_to])
+
+if not twilio_enabled:
     print("⚠️  Twilio credentials missing in .env – SMS alerts disabled.")
-    twilio_client = None
-else:
-    twilio_client = Client(twilio_sid, twilio_token)
+
+# twilio is imported and its Client built on the first alert, not at import
+_twilio_client = None
+_twilio_lock = threading.Lock()
+
+# Sends run off the scoring thread; pending ones finish at interpreter exit
+_sms_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sms")
+
+def _twilio():
+    global _twilio_client
+    with _twilio_lock:
+        if _twilio_client is None:
+            from twilio.rest import Client
+            _twilio_client = Client(twilio_sid, twilio_token)
+        return _twilio_client
 
 def send_sms_alert(user_id: str, fall_risk: float):
-    if twilio_client is None:
+    if not twilio_enabled:
         print("⚠️  SMS alert skipped (Twilio not configured).")
-        return
+        return None
 
     message_body = (
         f"🚨 HIGH FALL RISK ALERT 🚨\n"
@@ -53,8 +62,11 @@ def send_sms_alert(user_id: str, fall_risk: float):
         f"Time: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}"
     )
 
+    return _sms_pool.submit(_send_blocking, message_body)
+
+def _send_blocking(message_body: str):
     try:
-        message = twilio_client.messages.create(
+        message = _twilio().messages.create(
             body=message_body,
             from_=twilio_from,
             to=alert_to
@@ -67,7 +79,7 @@ def send_sms_alert(user_id: str, fall_risk: float):
 # DATA STRUCTURES
 # ==============================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ActivityEvent:
     timestamp: datetime
     activity: str            # Walk, Static, Transitions, Exercise, Stairs
@@ -75,76 +87,136 @@ class ActivityEvent:
     is_fall: bool             # True / False
 
 
+class EventWindow(NamedTuple):
+    """Columnar view of consecutive events, oldest first."""
+    activity_codes: np.ndarray   # uint8 Activity codes
+    fall_prob: np.ndarray        # float32
+    is_fall: np.ndarray          # bool
+
+    @classmethod
+    def from_events(cls, events: List[ActivityEvent]) -> "EventWindow":
+        return cls(
+            np.array([encode(Activity.parse(e.activity)) for e in events], dtype=np.uint8),
+            np.array([e.fall_prob for e in events], dtype=np.float32),
+            np.array([e.is_fall for e in events], dtype=np.bool_)
+        )
+
+    def __len__(self):
+        return len(self.activity_codes)
+
+
 class ActivityHistory:
-    def __init__(self):
-        self.events: List[ActivityEvent] = []
+    """Fixed-capacity ring buffer of the most recent events, stored as arrays."""
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.activity_codes = np.zeros(capacity, dtype=np.uint8)
+        self.fall_prob = np.zeros(capacity, dtype=np.float32)
+        self.is_fall = np.zeros(capacity, dtype=np.bool_)
+        self.head = 0    # next slot to write
+        self.count = 0
 
     def add_event(self, event: ActivityEvent):
-        self.events.append(event)
+        i = self.head
+        self.activity_codes[i] = encode(Activity.parse(event.activity))
+        self.fall_prob[i] = event.fall_prob
+        self.is_fall[i] = event.is_fall
 
-    def last_n_events(self, n=100):
-        return self.events[-n:]
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last_n_events(self, n=100) -> EventWindow:
+        n = min(n, self.count)
+        idx = (self.head - n + np.arange(n)) % self.capacity
+        return EventWindow(self.activity_codes[idx], self.fall_prob[idx], self.is_fall[idx])
 
 
 # ==============================
 # RISK SCORING ENGINE
 # ==============================
 
-class RiskScorer:
+# Scorers accept a history window or a plain list of events
+Events = Union[EventWindow, List[ActivityEvent]]
 
-    def compute_fall_risk(self, events: List[ActivityEvent]) -> float:
-        if not events:
-            return 0.0
 
-        total = len(events)
+def _as_window(events: Events) -> EventWindow:
+    return events if isinstance(events, EventWindow) else EventWindow.from_events(events)
 
-        fall_count = sum(e.is_fall for e in events)
-        near_fall_count = sum(0.45 <= e.fall_prob < 0.7 for e in events)
-        transition_instability = sum(e.activity == "Transitions" for e in events)
-        prolonged_inactivity = sum(e.activity == "Static" for e in events) > total * 0.6
 
-        fall_count /= total
-        near_fall_count /= total
-        transition_instability /= total
-        prolonged_inactivity = int(prolonged_inactivity)
+def _tally(events: Events):
+    """(total, (falls, near_falls, transitions, static, walk, exercise))"""
+    acts, fp, falls = _as_window(events)
+    total = len(acts)
+    counts, nnear, nfall = count_activities(acts, fp, falls, 0, total)
+    return total, (
+        nfall, nnear, counts[TRANSITIONS], counts[STATIC], counts[WALK], counts[EXERCISE]
+    )
 
-        risk = (
-            0.4 * fall_count +
-            0.3 * near_fall_count +
-            0.2 * transition_instability +
-            0.1 * prolonged_inactivity
-        )
 
-        return round(min(risk * 100, 100), 2)
+class RiskScorer:
+
+    def compute_all(self, events: Events):
+        """Fall risk, safety risk and rehab progress from one fused pass."""
+        if not len(events):
+            return 0.0, 0.0, 0.0
+
+        total, (nfall, nnear, ntrans, nstatic, nwalk, nexercise) = _tally(events)
+
+        return (
+            self._fall_risk(total, nfall, nnear, ntrans, nstatic),
+            self._safety_risk(total, nexercise, ntrans),
+            self._rehab_progress(total, nwalk, ntrans, nfall)
+        )
 
-    def compute_safety_risk(self, events: List[ActivityEvent]) -> float:
-        if not events:
+    def compute_fall_risk(self, events: Events) -> float:
+        if not len(events):
             return 0.0
 
-        total = len(events)
-        unsafe_exertion = sum(e.activity == "Exercise" for e in events)
-        transition_risk = sum(e.activity == "Transitions" for e in events)
+        total, (nfall, nnear, ntrans, nstatic, _, _) = _tally(events)
+        return self._fall_risk(total, nfall, nnear, ntrans, nstatic)
 
-        risk = (unsafe_exertion + transition_risk) / total
-        return round(min(risk * 100, 100), 2)
+    def compute_safety_risk(self, events: Events) -> float:
+        if not len(events):
+            return 0.0
+
+        total, (_, _, ntrans, _, _, nexercise) = _tally(events)
+        return self._safety_risk(total, nexercise, ntrans)
 
-    def compute_rehab_progress(self, events: List[ActivityEvent]) -> float:
-        if not events:
+    def compute_rehab_progress(self, events: Events) -> float:
+        if not len(events):
             return 0.0
 
-        total = len(events)
+        total, (nfall, _, ntrans, _, nwalk, _) = _tally(events)
+        return self._rehab_progress(total, nwalk, ntrans, nfall)
+
+    # ==============================
+    # SCORE FORMULAS
+    # ==============================
+
+    def _fall_risk(self, total, nfall, nnear, ntrans, nstatic) -> float:
+        prolonged_inactivity = int(nstatic > total * 0.6)
+
+        risk = (
+            0.4 * (nfall / total) +
+            0.3 * (nnear / total) +
+            0.2 * (ntrans / total) +
+            0.1 * prolonged_inactivity
+        )
 
-        walk_ratio = sum(e.activity == "Walk" for e in events) / total
-        transition_ratio = sum(e.activity == "Transitions" for e in events) / total
-        fall_ratio = sum(e.is_fall for e in events) / total
+        return round(float(min(risk * 100, 100)), 2)
 
+    def _safety_risk(self, total, nexercise, ntrans) -> float:
+        risk = (nexercise + ntrans) / total
+        return round(float(min(risk * 100, 100)), 2)
+
+    def _rehab_progress(self, total, nwalk, ntrans, nfall) -> float:
         progress = (
-            0.5 * walk_ratio +
-            0.3 * (1 - transition_ratio) +
-            0.2 * (1 - fall_ratio)
+            0.5 * (nwalk / total) +
+            0.3 * (1 - ntrans / total) +
+            0.2 * (1 - nfall / total)
         )
 
-        return round(progress * 100, 2)
+        return round(float(progress * 100), 2)
 
 
 # ==============================
@@ -164,8 +236,11 @@ def push_scores_to_firebase(user_id: str,
         "timestamp": datetime.utcnow().isoformat()
     }
 
-    db.collection("risk_scores").add(doc)
-    print("✅ Risk scores pushed to Firebase")
+    # risk_scores has always stored an ISO string timestamp; keep that type
+    if push_to_firebase("risk_scores", doc, stamp=False):
+        print("📤 Risk scores queued for Firebase")
+    else:
+        print("⚠️  Risk scores not stored (Firebase disabled).")
 
 
 # ==============================
@@ -206,9 +281,7 @@ if __name__ == "__main__":
 
     recent_events = history.last_n_events()
 
-    fall_risk = scorer.compute_fall_risk(recent_events)
-    safety_risk = scorer.compute_safety_risk(recent_events)
-    rehab_progress = scorer.compute_rehab_progress(recent_events)
+    fall_risk, safety_risk, rehab_progress = scorer.compute_all(recent_events)
 
     print("Fall Risk Score:", fall_risk)
     print("Safety Risk Score:", safety_risk)
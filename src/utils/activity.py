@@ -0,0 +1,32 @@
+from enum import IntEnum
+
+# =========================
+# ACTIVITY ENUM
+# =========================
+
+class Activity(IntEnum):
+    """
+    Integer-coded activity labels.
+
+    Raw labels are converted once at ingestion with ``Activity.parse``;
+    after that every comparison is an integer compare. Unknown labels pass
+    through unchanged, so they match no rule, as plain strings did.
+    """
+
+    Walk = 0
+    Static = 1
+    Transitions = 2
+    Exercise = 3
+    Stairs = 4
+
+    @classmethod
+    def parse(cls, value) -> "Activity":
+        """Member for a raw label such as ``"Walk"`` or a member; else ``value``."""
+        if isinstance(value, cls):
+            return value
+        return cls.__members__.get(value, value)
+
+
+def label(value) -> str:
+    """Output label for a parsed Activity/Zone or an unknown raw label."""
+    return value.name if isinstance(value, IntEnum) else value
@@ -0,0 +1,75 @@
+import numpy as np
+
+from src.utils.activity import Activity
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to NumPy reductions
+    njit = None
+
+# =========================
+# ACTIVITY CODES & BOUNDS
+# =========================
+
+WALK = int(Activity.Walk)
+STATIC = int(Activity.Static)
+TRANSITIONS = int(Activity.Transitions)
+EXERCISE = int(Activity.Exercise)
+
+# Unknown labels get their own code: counted in totals, matched by no rule
+UNKNOWN = len(Activity)
+N_CODES = UNKNOWN + 1
+
+# float32 bounds so the comparison matches the stored fall_prob precision
+NEAR_FALL_LO = np.float32(0.45)
+NEAR_FALL_HI = np.float32(0.7)
+
+
+def encode(activity) -> int:
+    """Code of a parsed activity (see ``Activity.parse``) for uint8 columns."""
+    return int(activity) if isinstance(activity, Activity) else UNKNOWN
+
+
+# =========================
+# COUNT KERNEL
+# =========================
+
+def _count_loop(codes, probs, falls, lo, hi):
+    counts = np.zeros(N_CODES, dtype=np.int64)
+    near_falls = fall_count = 0
+
+    # Branchless: activities and fall_prob are noisy, so branches mispredict
+    for i in range(lo, hi):
+        counts[codes[i]] += 1
+        p = probs[i]
+        near_falls += (p >= NEAR_FALL_LO) & (p < NEAR_FALL_HI)
+        fall_count += falls[i]
+
+    return counts, near_falls, fall_count
+
+
+def _count_vectorized(codes, probs, falls, lo, hi):
+    window_probs = probs[lo:hi]
+
+    return (
+        np.bincount(codes[lo:hi], minlength=N_CODES),
+        int(np.count_nonzero((window_probs >= NEAR_FALL_LO) & (window_probs < NEAR_FALL_HI))),
+        int(np.count_nonzero(falls[lo:hi]))
+    )
+
+
+# One fused pass over [lo, hi) of uint8 codes, float32 fall_prob and bool
+# is_fall columns: (per-activity counts, near_falls, falls)
+if njit is not None:
+    count_activities = njit(cache=True)(_count_loop)
+
+    # Compile (or load from the on-disk cache) at import, not on first event
+    count_activities(
+        np.zeros(1, dtype=np.uint8),
+        np.zeros(1, dtype=np.float32),
+        np.zeros(1, dtype=np.bool_),
+        0,
+        1
+    )
+else:
+    count_activities = _count_vectorized
@@ -0,0 +1,30 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+# =========================
+# CACHED UTC CLOCK
+# =========================
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# (epoch milliseconds, datetime, ISO string) for the last millisecond seen
+_last = (0, _EPOCH, "")
+
+def _now():
+    global _last
+    ms = time.time_ns() // 1_000_000
+    last = _last
+
+    # Events in the same millisecond reuse one datetime and one ISO string
+    if ms != last[0]:
+        dt = _EPOCH + timedelta(milliseconds=ms)
+        last = (ms, dt, dt.isoformat(timespec="milliseconds"))
+        _last = last
+
+    return last
+
+def utc_now() -> datetime:
+    return _now()[1]
+
+def utc_now_iso() -> str:
+    return _now()[2]
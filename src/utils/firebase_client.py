@@ -1,8 +1,16 @@
+import atexit
+import logging
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore
+import queue
+import threading
+import time
+
 from dotenv import load_dotenv
 
+from src.utils.clock import utc_now
+
+logger = logging.getLogger(__name__)
+
 # =========================
 # LOAD ENV VARIABLES
 # =========================
@@ -11,20 +19,115 @@ load_dotenv()
 # =========================
 # INITIALIZE FIREBASE ONCE
 # =========================
-service_account_path = os.getenv("FIREBASE_SERVICE_ACCOUNT")
+# FIREBASE_DISABLED=1/true/yes skips the firebase_admin import entirely
+# (offline runs); pushes are then dropped
+FIREBASE_DISABLED = os.getenv("FIREBASE_DISABLED", "").strip().lower() in ("1", "true", "yes")
+
+if FIREBASE_DISABLED:
+    db = None
+else:
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    service_account_path = os.getenv("FIREBASE_SERVICE_ACCOUNT")
 
-if not service_account_path:
-    raise ValueError("FIREBASE_SERVICE_ACCOUNT not set in environment")
+    if not service_account_path:
+        raise ValueError("FIREBASE_SERVICE_ACCOUNT not set in environment")
 
-if not firebase_admin._apps:
-    cred = credentials.Certificate(service_account_path)
-    firebase_admin.initialize_app(cred)
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(service_account_path)
+        firebase_admin.initialize_app(cred)
 
-db = firestore.client()
+    db = firestore.client()
 
 # =========================
-# PUSH HELPER
+# ASYNC BATCHING PUSH
 # =========================
-def push_to_firebase(collection: str, data: dict):
-    data["timestamp"] = firestore.SERVER_TIMESTAMP
-    db.collection(collection).add(data)
+MAX_BATCH_WRITES = 500  # Firestore limit per batch commit
+DRAIN_TIMEOUT = 0.05    # seconds a worker waits to fill a batch
+NUM_WORKERS = 2
+COMMIT_ATTEMPTS = 3     # a failed batch is retried before it is dropped
+RETRY_DELAY = 0.5       # seconds before the first retry, doubled after each
+
+_q = queue.Queue(maxsize=10_000)
+
+def push_to_firebase(collection: str, data: dict, stamp: bool = True) -> bool:
+    """
+    Queue one document; returns False when Firebase is disabled.
+
+    With ``stamp`` the queued copy gets a client-side ``timestamp``
+    (keeps each document fully materialized for batching); collections
+    that store their own timestamp format pass ``stamp=False``.
+    The caller's dict is never modified.
+    """
+    if db is None:
+        return False
+
+    doc = {**data, "timestamp": utc_now()} if stamp else dict(data)
+
+    # Workers commit in the background; a full queue applies backpressure
+    _q.put((collection, doc))
+    return True
+
+def push_batch_to_firebase(collection: str, items: list):
+    for data in items:
+        push_to_firebase(collection, data)
+
+def flush():
+    # Block until every queued write has been committed
+    _q.join()
+
+def _worker():
+    while True:
+        items = [_q.get()]
+        _drain_upto(items, MAX_BATCH_WRITES, DRAIN_TIMEOUT)
+
+        try:
+            _commit(items)
+        finally:
+            for _ in items:
+                _q.task_done()
+
+def _commit(items):
+    # Document ids are fixed up front so a retry after an ambiguous failure
+    # rewrites the same documents instead of duplicating them
+    writes = [(db.collection(collection).document(), data) for collection, data in items]
+
+    for attempt in range(1, COMMIT_ATTEMPTS + 1):
+        try:
+            batch = db.batch()
+            for ref, data in writes:
+                batch.set(ref, data)
+            batch.commit()
+            return
+        except Exception:
+            if attempt == COMMIT_ATTEMPTS:
+                logger.exception(
+                    "Firebase batch commit failed after %d attempts; dropped %d writes",
+                    attempt, len(writes)
+                )
+                return
+
+            logger.warning(
+                "Firebase batch commit failed (attempt %d/%d, %d writes); retrying",
+                attempt, COMMIT_ATTEMPTS, len(writes), exc_info=True
+            )
+            time.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+
+def _drain_upto(items, limit, timeout):
+    deadline = time.monotonic() + timeout
+    while len(items) < limit:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            items.append(_q.get(timeout=remaining))
+        except queue.Empty:
+            break
+
+if db is not None:
+    for _ in range(NUM_WORKERS):
+        threading.Thread(target=_worker, daemon=True, name="firebase-push").start()
+
+    # Persist everything still queued on exit
+    atexit.register(flush)
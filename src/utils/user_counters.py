@@ -0,0 +1,45 @@
+import numpy as np
+
+# =========================
+# PER-USER COUNTERS
+# =========================
+
+DEFAULT_CAPACITY = 1024  # initial rows; doubled whenever full
+
+
+class UserCounters:
+    """
+    Named int32 counter columns with one row per user_id.
+
+    Each keyword argument names a column and gives its initial value,
+    e.g. ``UserCounters(violations=0, safety_score=100)``. Hot paths
+    resolve ``row(user_id)`` once and index the columns directly.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, **initial: int):
+        self._rows = {}
+        self._initial = initial
+        for name, value in initial.items():
+            setattr(self, name, np.full(capacity, value, dtype=np.int32))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, user_id) -> int:
+        row = self._rows.get(user_id)
+        if row is None:
+            row = self._rows[user_id] = len(self._rows)
+            self._grow(row)
+        return row
+
+    def get(self, user_id, name: str) -> int:
+        row = self.row(user_id)  # may grow the columns
+        return int(getattr(self, name)[row])
+
+    def _grow(self, row):
+        for name, value in self._initial.items():
+            column = getattr(self, name)
+            size = len(column)
+            if row >= size:
+                extra = np.full(max(size, 1), value, dtype=np.int32)
+                setattr(self, name, np.concatenate((column, extra)))
@@ -0,0 +1,25 @@
+from enum import IntEnum
+
+# =========================
+# ZONE ENUM
+# =========================
+
+class Zone(IntEnum):
+    """
+    Integer-coded workplace zones.
+
+    Raw labels are converted once at ingestion with ``Zone.parse``
+    (unknown labels pass through unchanged); output payloads carry
+    ``label(zone)`` back out.
+    """
+
+    Restricted_Zone = 0
+    Safe_Zone = 1
+    Hazard_Zone = 2
+
+    @classmethod
+    def parse(cls, value) -> "Zone":
+        """Member for a raw label such as ``"Safe_Zone"`` or a member; else ``value``."""
+        if isinstance(value, cls):
+            return value
+        return cls.__members__.get(value, value)
@@ -1,29 +1,39 @@
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List
-from collections import defaultdict
+from typing import Deque
+from collections import deque
 
+from src.utils.activity import Activity, label
+from src.utils.clock import utc_now, utc_now_iso
 from src.utils.firebase_client import push_to_firebase
+from src.utils.user_counters import UserCounters
+from src.utils.zone import Zone
 
 # =====================================
 # DATA STRUCTURES
 # =====================================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ZoneEvent:
     user_id: str
-    zone: str                 # Restricted_Zone, Safe_Zone, Hazard_Zone
+    zone: Zone                # Restricted_Zone, Safe_Zone, Hazard_Zone (others kept as str)
     timestamp: datetime
 
+    def __post_init__(self):
+        object.__setattr__(self, "zone", Zone.parse(self.zone))
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class ActivityEvent:
     user_id: str
-    activity: str             # Walk, Static, Transitions, Exercise, Stairs
+    activity: Activity        # Walk, Static, Transitions, Exercise, Stairs (others kept as str)
     timestamp: datetime
 
+    def __post_init__(self):
+        object.__setattr__(self, "activity", Activity.parse(self.activity))
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Violation:
     user_id: str
     violation_type: str
@@ -35,11 +45,18 @@ class Violation:
 # WORKPLACE SAFETY ENGINE
 # =====================================
 
+MAX_VIOLATION_HISTORY = 1024  # older violations live in Firebase only
+VIOLATION_PENALTY = 15        # safety points lost per violation
+
+
 class WorkplaceSafetyEngine:
 
     def __init__(self):
-        self.violations: List[Violation] = []
-        self.user_violation_count = defaultdict(int)
+        self.violations: Deque[Violation] = deque(maxlen=MAX_VIOLATION_HISTORY)
+
+        # Violation count and running safety score per user; the score is
+        # updated on each violation instead of per dashboard push
+        self._counters = UserCounters(violations=0, safety_score=100)
 
     # ---------------------------------
     # STEP 2: Zone + Activity Fusion
@@ -52,45 +69,50 @@ class WorkplaceSafetyEngine:
             return
 
         user = zone_event.user_id
+        zone = zone_event.zone
+        activity = activity_event.activity
 
         # Rule 1: Restricted zone entry
-        if zone_event.zone == "Restricted_Zone" and activity_event.activity == "Walk":
+        if zone is Zone.Restricted_Zone and activity is Activity.Walk:
             self._log_violation(
                 user,
                 "Unauthorized entry into restricted zone",
                 "High",
-                zone_event.zone
+                zone
             )
 
         # Rule 2: Overexertion
-        if activity_event.activity == "Exercise":
+        if activity is Activity.Exercise:
             self._log_violation(
                 user,
                 "Overexertion detected",
                 "Medium",
-                zone_event.zone
+                zone
             )
 
         # Rule 3: Prolonged inactivity
-        if activity_event.activity == "Static":
+        if activity is Activity.Static:
             self._log_violation(
                 user,
                 "Prolonged inactivity (collapse risk)",
                 "Medium",
-                zone_event.zone
+                zone
             )
 
     # ---------------------------------
     # STEP 3: Violation logging
     # ---------------------------------
     def _log_violation(self, user_id, violation_type, severity, zone):
-        self.user_violation_count[user_id] += 1
+        counters = self._counters
+        row = counters.row(user_id)
+        counters.violations[row] += 1
+        counters.safety_score[row] = max(counters.safety_score[row] - VIOLATION_PENALTY, 0)
 
         violation = Violation(
             user_id=user_id,
             violation_type=violation_type,
             severity=severity,
-            timestamp=datetime.now(timezone.utc)
+            timestamp=utc_now()
         )
 
         self.violations.append(violation)
@@ -102,8 +124,8 @@ class WorkplaceSafetyEngine:
                 "user_id": user_id,
                 "violation_type": violation_type,
                 "severity": severity,
-                "zone": zone,
-                "timestamp": violation.timestamp.isoformat()
+                "zone": label(zone),
+                "timestamp": utc_now_iso()
             }
         )
 
@@ -111,7 +133,7 @@ class WorkplaceSafetyEngine:
     # STEP 3: Escalation Logic
     # ---------------------------------
     def get_escalation_level(self, user_id):
-        count = self.user_violation_count[user_id]
+        count = self.get_violation_count(user_id)
 
         if count >= 5:
             return "Admin Escalation"
@@ -125,14 +147,18 @@ class WorkplaceSafetyEngine:
     # ---------------------------------
     # STEP 4: Safety Score & Metrics
     # ---------------------------------
+    def get_violation_count(self, user_id):
+        return self._counters.get(user_id, "violations")
+
     def compute_safety_score(self, user_id):
-        count = self.user_violation_count[user_id]
-        return max(100 - (count * 15), 0)
+        return self._counters.get(user_id, "safety_score")
 
     def zone_risk_level(self, zone):
-        if zone == "Restricted_Zone":
+        zone = Zone.parse(zone)
+
+        if zone is Zone.Restricted_Zone:
             return "High"
-        elif zone == "Hazard_Zone":
+        elif zone is Zone.Hazard_Zone:
             return "Medium"
         else:
             return "Low"
@@ -144,11 +170,11 @@ class WorkplaceSafetyEngine:
 
         payload = {
             "user_id": user_id,
-            "violation_count": self.user_violation_count[user_id],
+            "violation_count": self.get_violation_count(user_id),
             "escalation_level": self.get_escalation_level(user_id),
             "safety_score": self.compute_safety_score(user_id),
             "zone_risk_level": self.zone_risk_level(zone),
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            "timestamp": utc_now_iso()
         }
 
         push_to_firebase("workplace_safety_dashboard", payload)